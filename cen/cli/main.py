@@ -1,11 +1,26 @@
+from dataclasses import dataclass
 from typing import Optional
+import queue
 import time
 import threading
 
 import click
 
 from cen.core.gmail import GmailClient
-from cen.core.motion import MotionDetector
+
+
+@dataclass(slots=True)
+class _Stats:
+	"""Motion counters for the hourly summary; mutate only under the stats lock.
+
+	slots=True stores the counters in fixed C slots instead of a per-instance
+	dict, so the hot-path attribute writes skip hash-table lookups.
+	"""
+	events: int = 0
+	total_motion_area: int = 0
+	max_motion_area: int = 0
+	max_contours: int = 0
+	anomalies: int = 0
 
 
 @click.group()
@@ -13,26 +28,39 @@ def cli() -> None:
 	"""CEN - Camera Event Notifier"""
 
 
+# The credential/storage options are identical on every command that talks to
+# Gmail; build the decorators once and apply them in a loop instead of
+# repeating ~60 lines of @click.option noise across the module.
+_AUTH_OPTIONS = (
+	click.option("--client-id", envvar="GOOGLE_CLIENT_ID", required=True, help="Google OAuth Client ID"),
+	click.option("--client-secret", envvar="GOOGLE_CLIENT_SECRET", required=True, help="Google OAuth Client Secret"),
+	click.option("--storage", envvar="CEN_TOKEN_STORAGE", type=click.Choice(["keyring", "file"]), default="keyring", show_default=True),
+)
+
+
+def _auth_opts(f):
+	for opt in reversed(_AUTH_OPTIONS):
+		f = opt(f)
+	return f
+
+
 @cli.command()
-@click.option("--client-id", envvar="GOOGLE_CLIENT_ID", required=True, help="Google OAuth Client ID")
-@click.option("--client-secret", envvar="GOOGLE_CLIENT_SECRET", required=True, help="Google OAuth Client Secret")
+@_auth_opts
 @click.option("--scopes", default="https://www.googleapis.com/auth/gmail.send", show_default=True, help="OAuth scopes (comma-separated)")
-@click.option("--storage", "storage", envvar="CEN_TOKEN_STORAGE", type=click.Choice(["keyring", "file"]), default="keyring", show_default=True)
 @click.option("--force", is_flag=True, help="Force re-consent and get a new refresh token")
 @click.option("--console", is_flag=True, help="Use console copy/paste flow (for headless/containers)")
 @click.option("--open-browser/--no-open-browser", default=True, show_default=True, help="Open browser automatically (local server flow)")
 @click.option("--login-hint", envvar="GMAIL_LOGIN_HINT", help="Suggest account email on Google screen")
-def login(client_id: str, client_secret: str, scopes: str, storage: str, force: bool, console: bool, open_browser: bool, login_hint: Optional[str]) -> None:
+@click.option("--verbose", is_flag=True, help="Print the OAuth redirect-URI configuration guidance")
+def login(client_id: str, client_secret: str, scopes: str, storage: str, force: bool, console: bool, open_browser: bool, login_hint: Optional[str], verbose: bool) -> None:
 	"""Open browser to sign in with Google and store tokens."""
 	gmail = GmailClient(client_id=client_id, client_secret=client_secret, scopes=[s.strip() for s in scopes.split(",") if s.strip()])
-	gmail.login(interactive=True, force=force, storage_backend=storage, use_console=console, open_browser=open_browser, login_hint=login_hint)
+	gmail.login(interactive=True, force=force, storage_backend=storage, use_console=console, open_browser=open_browser, login_hint=login_hint, verbose=verbose)
 	click.echo("Login completed and credentials stored.")
 
 
 @cli.command("export-token")
-@click.option("--client-id", envvar="GOOGLE_CLIENT_ID", required=True)
-@click.option("--client-secret", envvar="GOOGLE_CLIENT_SECRET", required=True)
-@click.option("--storage", envvar="CEN_TOKEN_STORAGE", type=click.Choice(["keyring", "file"]), default="keyring", show_default=True)
+@_auth_opts
 def export_token(client_id: str, client_secret: str, storage: str) -> None:
 	"""Print the authorized user JSON (use to set CEN_GMAIL_TOKEN_JSON env)."""
 	gmail = GmailClient(client_id=client_id, client_secret=client_secret, scopes=["https://www.googleapis.com/auth/gmail.send"])
@@ -45,9 +73,7 @@ def export_token(client_id: str, client_secret: str, storage: str) -> None:
 @click.option("--subject", default="CEN test email", show_default=True)
 @click.option("--body", default="Hello from CEN", show_default=True)
 @click.option("--sender", envvar="GMAIL_SENDER", help="Override sender (defaults to authenticated account)")
-@click.option("--client-id", envvar="GOOGLE_CLIENT_ID", required=True)
-@click.option("--client-secret", envvar="GOOGLE_CLIENT_SECRET", required=True)
-@click.option("--storage", envvar="CEN_TOKEN_STORAGE", type=click.Choice(["keyring", "file"]), default="keyring", show_default=True)
+@_auth_opts
 def test_email(to_email: str, subject: str, body: str, sender: Optional[str], client_id: str, client_secret: str, storage: str) -> None:
 	"""Send a test email via Gmail API."""
 	gmail = GmailClient(client_id=client_id, client_secret=client_secret, scopes=["https://www.googleapis.com/auth/gmail.send"])
@@ -62,43 +88,52 @@ def test_email(to_email: str, subject: str, body: str, sender: Optional[str], cl
 @click.option("--min-interval-seconds", default=60, show_default=True, type=int, help="Minimum seconds between notifications")
 @click.option("--to", "to_email", required=True, help="Recipient email for notifications")
 @click.option("--sender", envvar="GMAIL_SENDER", help="Override sender")
-@click.option("--client-id", envvar="GOOGLE_CLIENT_ID", required=True)
-@click.option("--client-secret", envvar="GOOGLE_CLIENT_SECRET", required=True)
-@click.option("--storage", envvar="CEN_TOKEN_STORAGE", type=click.Choice(["keyring", "file"]), default="keyring", show_default=True)
+@_auth_opts
 @click.option("--snapshot", is_flag=True, help="Attach a snapshot image when motion is detected")
+@click.option("--snapshot-max-width", default=640, show_default=True, type=int, help="Downscale snapshot to this width before encoding (0 keeps full resolution)")
 @click.option("--subject", default="CEN motion detected", show_default=True)
 @click.option("--body", default="Motion was detected by your camera.", show_default=True)
 @click.option("--hourly-summary", is_flag=True, help="Send an hourly summary email with motion statistics")
 @click.option("--anomaly-threshold", type=int, default=5, show_default=True, help="Contours count threshold to consider as anomaly")
-def monitor(device_index: int, sensitivity: int, min_interval_seconds: int, to_email: str, sender: Optional[str], client_id: str, client_secret: str, storage: str, snapshot: bool, subject: str, body: str, hourly_summary: bool, anomaly_threshold: int) -> None:
+def monitor(device_index: int, sensitivity: int, min_interval_seconds: int, to_email: str, sender: Optional[str], client_id: str, client_secret: str, storage: str, snapshot: bool, snapshot_max_width: int, subject: str, body: str, hourly_summary: bool, anomaly_threshold: int) -> None:
 	"""Monitor webcam and send email on motion."""
+	# cv2/numpy (and optionally numba) load only for this command; login and
+	# test-email cold-start without the vision stack.
+	from cen.core.motion import MotionDetector
+
 	gmail = GmailClient(client_id=client_id, client_secret=client_secret, scopes=["https://www.googleapis.com/auth/gmail.send"])
 	creds = gmail.ensure_logged_in(storage_backend=storage)
 
-	detector = MotionDetector(device_index=device_index, min_contour_area=sensitivity)
+	detector = MotionDetector(
+		device_index=device_index,
+		min_contour_area=sensitivity,
+		min_interval_seconds=max(1, min_interval_seconds),
+	)
 	click.echo("Starting motion detection. Press Ctrl+C to stop.")
 
-	last_sent_at = 0.0
-	stats = {
-		"events": 0,
-		"total_motion_area": 0,
-		"max_motion_area": 0,
-		"max_contours": 0,
-		"anomalies": 0,
-	}
+	stats = _Stats()
+	stats_lock = threading.Lock()
+
+	summary_stop = threading.Event()
 
 	def send_summary() -> None:
+		nonlocal stats
 		while True:
-			time.sleep(3600)
-			if not hourly_summary:
-				continue
+			# Align to the next wall-clock hour boundary; Event.wait (instead
+			# of time.sleep) lets shutdown interrupt the wait immediately.
+			if summary_stop.wait(3600 - (time.time() % 3600)):
+				return
+			# Swap in a fresh counter object so the snapshot and reset are
+			# atomic with respect to updates from the event loop.
+			with stats_lock:
+				snapshot_stats, stats = stats, _Stats()
 			body_lines = [
 				"Hourly motion summary:",
-				f"- Events: {stats['events']}",
-				f"- Total motion area: {stats['total_motion_area']}",
-				f"- Peak motion area: {stats['max_motion_area']}",
-				f"- Peak contours: {stats['max_contours']}",
-				f"- Anomalies: {stats['anomalies']}",
+				f"- Events: {snapshot_stats.events}",
+				f"- Total motion area: {snapshot_stats.total_motion_area}",
+				f"- Peak motion area: {snapshot_stats.max_motion_area}",
+				f"- Peak contours: {snapshot_stats.max_contours}",
+				f"- Anomalies: {snapshot_stats.anomalies}",
 			]
 			try:
 				gmail.send_email(
@@ -109,51 +144,111 @@ def monitor(device_index: int, sensitivity: int, min_interval_seconds: int, to_e
 				)
 			except Exception:
 				pass
-			finally:
-				# reset counters
-				stats["events"] = 0
-				stats["total_motion_area"] = 0
-				stats["max_motion_area"] = 0
-				stats["max_contours"] = 0
-				stats["anomalies"] = 0
+	# Bounded queue + worker thread so a Gmail round-trip never blocks frame
+	# consumption; bursts beyond the queue capacity drop the oldest entry.
+	send_queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=16)
+
+	def send_worker() -> None:
+		while True:
+			item = send_queue.get()
+			if item is None:
+				break
+			msg_subject, msg_body, msg_snapshot = item
+			# The snapshot arrives as a Future from the encode pool; by the
+			# time the worker gets here it has usually already resolved. A
+			# failed encode must not kill this (only) sender thread — the
+			# alert still goes out, just without the attachment.
+			msg_attachment = None
+			if msg_snapshot is not None:
+				try:
+					retval, buf = msg_snapshot.result()
+					if retval:
+						msg_attachment = ("snapshot.jpg", buf, "image/jpeg")
+				except Exception as e:
+					click.echo(f"Snapshot encode failed: {e}")
+			try:
+				gmail.send_email(
+					to_email=to_email,
+					subject=msg_subject,
+					body_text=msg_body,
+					sender=sender,
+					attachment=msg_attachment,
+				)
+				click.echo("Notification sent.")
+			except Exception as e:
+				click.echo(f"Failed to send notification: {e}")
+
+	worker = threading.Thread(target=send_worker, daemon=True)
+	worker.start()
+
+	def enqueue_send(item: tuple) -> None:
+		try:
+			send_queue.put_nowait(item)
+		except queue.Full:
+			# Drop the oldest pending notification to make room for the newest.
+			try:
+				send_queue.get_nowait()
+			except queue.Empty:
+				pass
+			try:
+				send_queue.put_nowait(item)
+			except queue.Full:
+				pass
+
 	try:
 		if hourly_summary:
 			threading.Thread(target=send_summary, daemon=True).start()
+		# detect_events applies the min-interval throttle itself, so every
+		# event that arrives here is meant to be sent.
 		for event in detector.detect_events():
-			if time.time() - last_sent_at < max(1, min_interval_seconds):
-				continue
-			attachment = None
+			# Kick off the JPEG encode immediately; it runs on the encode pool
+			# while this loop keeps consuming frames and the send worker only
+			# waits on the future when assembling the email.
+			snapshot_future = None
 			if snapshot and event.frame is not None:
-				retval, buf = event.encode_jpeg()
-				if retval:
-					attachment = ("snapshot.jpg", buf, "image/jpeg")
-			# Update stats
-			stats["events"] += 1
-			stats["total_motion_area"] += int(getattr(event, "motion_area", 0))
-			stats["max_motion_area"] = max(stats["max_motion_area"], int(getattr(event, "motion_area", 0)))
-			stats["max_contours"] = max(stats["max_contours"], int(getattr(event, "num_contours", 0)))
+				snapshot_future = event.encode_jpeg_async(quality=80, max_width=snapshot_max_width)
+			motion_area = int(event.motion_area)
+			num_contours = int(event.num_contours)
 
 			# Decide if anomaly
-			is_anomaly = int(getattr(event, "num_contours", 0)) >= max(1, anomaly_threshold)
-			if is_anomaly:
-				stats["anomalies"] += 1
+			is_anomaly = num_contours >= max(1, anomaly_threshold)
+
+			# Update stats
+			with stats_lock:
+				stats.events += 1
+				stats.total_motion_area += motion_area
+				stats.max_motion_area = max(stats.max_motion_area, motion_area)
+				stats.max_contours = max(stats.max_contours, num_contours)
+				if is_anomaly:
+					stats.anomalies += 1
 
 			message_body = body
-			message_body += f"\nMotion area: {getattr(event, 'motion_area', 0)}"
-			message_body += f"\nContours: {getattr(event, 'num_contours', 0)}"
+			message_body += f"\nMotion area: {motion_area}"
+			message_body += f"\nContours: {num_contours}"
 			if is_anomaly:
 				message_body += "\n⚠️ Anomaly detected!"
 
-			gmail.send_email(
-				to_email=to_email,
-				subject=subject if not is_anomaly else f"[ANOMALY] {subject}",
-				body_text=message_body,
-				sender=sender,
-				attachment=attachment,
-			)
-			last_sent_at = time.time()
-			click.echo("Notification sent.")
+			enqueue_send((
+				subject if not is_anomaly else f"[ANOMALY] {subject}",
+				message_body,
+				snapshot_future,
+			))
 	except KeyboardInterrupt:
 		click.echo("Stopping monitor...")
 	finally:
+		summary_stop.set()
+		# Never block shutdown on a full queue (the worker may be dead or mid
+		# backoff): drop the oldest pending item to make room for the sentinel.
+		try:
+			send_queue.put_nowait(None)
+		except queue.Full:
+			try:
+				send_queue.get_nowait()
+			except queue.Empty:
+				pass
+			try:
+				send_queue.put_nowait(None)
+			except queue.Full:
+				pass
+		worker.join(timeout=5)
 		detector.close()
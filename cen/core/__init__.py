@@ -1,8 +1,30 @@
-from .gmail import GmailClient
-from .motion import MotionDetector, MotionEvent
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+	from .gmail import GmailClient
+	from .motion import MotionDetector, MotionEvent
 
 __all__ = [
 	"GmailClient",
 	"MotionDetector",
 	"MotionEvent",
 ]
+
+# PEP 562 lazy exports: importing cen.core stays free, and the gmail/motion
+# modules (and their heavy dependency stacks) load only when first accessed.
+_LAZY_EXPORTS = {
+	"GmailClient": "cen.core.gmail",
+	"MotionDetector": "cen.core.motion",
+	"MotionEvent": "cen.core.motion",
+}
+
+
+def __getattr__(name: str):
+	module_name = _LAZY_EXPORTS.get(name)
+	if module_name is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	import importlib
+
+	value = getattr(importlib.import_module(module_name), name)
+	globals()[name] = value
+	return value
@@ -1,32 +1,319 @@
+from __future__ import annotations
+
 import base64
+import hashlib
 import json
 import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
 from dataclasses import dataclass, field
-from email.message import EmailMessage
-from typing import Optional, Sequence, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+	import google_auth_httplib2
+	from google.oauth2.credentials import Credentials
+
+# The google/keyring stack pulls in a couple hundred modules and costs
+# 200-400 ms of import time; defer it to the methods that actually use it
+# so `cen --help` and motion-only paths stay snappy. sys.modules makes the
+# repeated function-level imports effectively free after the first call.
+
+try:
+	# SIMD-accelerated base64; matters for large JPEG snapshot attachments.
+	import pybase64 as _b64
+except ImportError:
+	_b64 = base64
 
-import keyring
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+try:
+	import orjson as _json
+except ImportError:
+	_json = json
 
 
 GMAIL_SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
 SERVICE_NAME = "cen-gmail"
 TOKEN_USERNAME = "cen-user"
 
+# Ports matching the redirect URIs configured in Google Cloud Console.
+_OAUTH_PORTS = [8080, 8081, 8082, 8090, 9000, 9001, 9090, 9091]
+
+
+def _find_available_port(ports: Sequence[int]) -> Optional[int]:
+	"""Return the first port in `ports` we can bind on localhost, or None."""
+	import socket
+
+	for port in ports:
+		try:
+			sock = socket.socket()
+			sock.bind(("localhost", port))
+			sock.close()
+			return port
+		except OSError:
+			continue
+	return None
+
+# Process-level credential cache so repeated GmailClient constructions
+# (scripts, tests) don't re-hit the OS keyring / Keychain per instance.
+_CREDS_CACHE: dict = {}
+
+# Process-level Gmail service cache: (client_id, scopes) -> (creds, service,
+# lock). Instances sharing credentials also share the built Resource tree and
+# its keep-alive HTTP transport; entries are replaced when credentials rotate.
+# The lock serializes requests on the transport: httplib2.Http is not
+# thread-safe, and the monitor sends from both the queue worker and the
+# hourly-summary thread.
+_SERVICE_CACHE: dict = {}
+
+# Memoized keyring payload: (raw token JSON, monotonic time it was read).
+_KEYRING_PAYLOAD_TTL_SECONDS = 60.0
+_keyring_payload: Optional[tuple] = None
+
+_keyring_backend = None
+
+
+def _get_keyring():
+	"""Return the resolved keyring backend, discovered once per process.
+
+	keyring.get_password/set_password re-run backend discovery on every call;
+	on Linux Secret Service backends that means repeated D-Bus negotiation.
+	"""
+	global _keyring_backend
+	if _keyring_backend is None:
+		import keyring
+
+		_keyring_backend = keyring.get_keyring()
+	return _keyring_backend
+
+
+_refresh_request = None
+
+
+def _get_refresh_request():
+	"""Return the shared transport used for token refreshes.
+
+	Backed by one requests.Session so the TLS connection to
+	oauth2.googleapis.com stays alive across periodic refreshes instead of
+	being re-established per refresh.
+	"""
+	global _refresh_request
+	if _refresh_request is None:
+		import requests
+		from google.auth.transport.requests import Request
+
+		_refresh_request = Request(session=requests.Session())
+	return _refresh_request
+
+
+class _TokenRefresher:
+	"""Refreshes credentials from a daemon thread before they expire.
+
+	Keeps the token-refresh round-trip off the send_email hot path: when a
+	token is merely close to expiry it is still usable, so the caller keeps
+	going while the refresh (and keyring/file persistence) happens in the
+	background. At most one refresh is in flight at a time.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._in_flight = False
+
+	def submit(self, client: "GmailClient", creds: Credentials, storage_backend: str) -> None:
+		with self._lock:
+			if self._in_flight:
+				return
+			self._in_flight = True
+		threading.Thread(
+			target=self._refresh, args=(client, creds, storage_backend), daemon=True
+		).start()
+
+	def _refresh(self, client: "GmailClient", creds: Credentials, storage_backend: str) -> None:
+		try:
+			# Credentials.refresh mutates the object in place, so every
+			# cached reference picks up the new token automatically.
+			creds.refresh(_get_refresh_request())
+			if storage_backend == "keyring":
+				client._save_credentials_to_keyring(creds)
+			else:
+				client._save_credentials_to_file(creds)
+		except Exception:
+			# Inline refresh in the loaders remains the fallback when the
+			# token actually expires.
+			pass
+		finally:
+			with self._lock:
+				self._in_flight = False
+
+
+_TOKEN_REFRESHER = _TokenRefresher()
+
+
+@lru_cache(maxsize=4)
+def _parse_token(raw: str) -> dict:
+	"""Parse an authorized-user token JSON, memoized per raw payload.
+
+	Token payloads are small and stable within a process, so re-invocations
+	(multiple subcommands, tests) skip JSON parsing entirely.
+	"""
+	return _json.loads(raw)
+
+
+# Fixed multipart boundary; safe because the only binary part is base64-encoded
+# and the text part is plain ASCII/UTF-8 alert text we generate ourselves.
+_MIME_BOUNDARY = b"==cen-part-boundary=="
+
+
+# Wrapped-base64 attachment payloads keyed by content digest. An anomaly
+# retriggering on an unchanged frame re-sends identical JPEG bytes; hashing
+# with blake2b is far cheaper than redoing base64 + line wrapping.
+_ATTACHMENT_B64_CACHE: "OrderedDict[bytes, bytes]" = OrderedDict()
+_ATTACHMENT_B64_CACHE_MAX = 8
+
+
+def _wrap_b64(data: bytes) -> bytes:
+	"""Base64-encode and wrap at the RFC-2045 76-character line limit."""
+	key = hashlib.blake2b(data, digest_size=8).digest()
+	cached = _ATTACHMENT_B64_CACHE.get(key)
+	if cached is not None:
+		_ATTACHMENT_B64_CACHE.move_to_end(key)
+		return cached
+	# Slice through a memoryview so line wrapping reads the encoded buffer
+	# in place; bytes slicing would copy every 76-byte chunk before the join.
+	encoded = memoryview(_b64.b64encode(data))
+	wrapped = b"\r\n".join(encoded[i:i + 76] for i in range(0, len(encoded), 76))
+	_ATTACHMENT_B64_CACHE[key] = wrapped
+	if len(_ATTACHMENT_B64_CACHE) > _ATTACHMENT_B64_CACHE_MAX:
+		_ATTACHMENT_B64_CACHE.popitem(last=False)
+	return wrapped
+
+
+def _header_value(value: str, encode_non_ascii: bool = False) -> str:
+	"""Validate a header value; CLI-supplied strings end up here verbatim.
+
+	CR/LF would let a crafted --subject/--to inject extra headers or truncate
+	the message, so they are rejected outright. Non-ASCII text (allowed in the
+	subject, not in addresses) gets the RFC 2047 encoded-word form the old
+	EmailMessage path produced.
+	"""
+	if "\r" in value or "\n" in value:
+		raise ValueError(f"Newlines are not allowed in email header values: {value!r}")
+	if encode_non_ascii and not value.isascii():
+		from email.header import Header
+
+		return Header(value, "utf-8").encode()
+	return value
+
+
+def _build_raw(
+	to_email: str,
+	sender: Optional[str],
+	subject: str,
+	body_text: str,
+	attachment: Optional[Tuple[str, bytes, str]],
+) -> bytes:
+	"""Hand-assemble the RFC-822 payload for CEN's fixed message schema.
+
+	The schema is a plain-text body with at most one JPEG attachment, so the
+	email.message/generator policy machinery (header folding, content-manager
+	dispatch) is overhead we can skip entirely.
+	"""
+	headers = [f"To: {_header_value(to_email)}"]
+	if sender:
+		headers.append(f"From: {_header_value(sender)}")
+	headers.append(f"Subject: {_header_value(subject, encode_non_ascii=True)}")
+	headers.append("MIME-Version: 1.0")
+
+	if attachment is None:
+		headers.append('Content-Type: text/plain; charset="utf-8"')
+		headers.append("Content-Transfer-Encoding: 8bit")
+		headers.append("")
+		headers.append(body_text)
+		return "\r\n".join(headers).encode("utf-8")
+
+	filename, data, mime_type = attachment
+	headers.append(f'Content-Type: multipart/mixed; boundary="{_MIME_BOUNDARY.decode("ascii")}"')
+	head = "\r\n".join(headers).encode("utf-8")
+	attach_head = (
+		f"Content-Type: {_header_value(mime_type)}\r\n"
+		f'Content-Disposition: attachment; filename="{_header_value(filename)}"\r\n'
+		"Content-Transfer-Encoding: base64"
+	).encode("utf-8")
+	parts = [
+		head,
+		b"",
+		b"--" + _MIME_BOUNDARY,
+		b'Content-Type: text/plain; charset="utf-8"',
+		b"Content-Transfer-Encoding: 8bit",
+		b"",
+		body_text.encode("utf-8"),
+		b"--" + _MIME_BOUNDARY,
+		attach_head,
+		b"",
+		_wrap_b64(data),
+		b"--" + _MIME_BOUNDARY + b"--",
+		b"",
+	]
+	return b"\r\n".join(parts)
+
+
+# Attachments above this size are not worth memoizing: each cached entry
+# retains both the attachment bytes (in the key) and the encoded message
+# (as the value), so unique large snapshots would pin megabytes of stale
+# payloads in the cache without ever hitting.
+_ENCODE_CACHE_MAX_ATTACHMENT = 256 * 1024
+
+
+def _encode_message(
+	to_email: str,
+	sender: Optional[str],
+	subject: str,
+	body_text: str,
+	attachment: Optional[Tuple[str, bytes, str]],
+) -> str:
+	"""Build and urlsafe-b64 encode the RFC-822 message, memoized per content.
+
+	The monitor loop often re-sends identical alerts (same body, same or no
+	attachment); caching skips MIME assembly and base64 for repeats.
+	"""
+	if attachment is not None and len(attachment[1]) > _ENCODE_CACHE_MAX_ATTACHMENT:
+		return _b64.urlsafe_b64encode(_build_raw(to_email, sender, subject, body_text, attachment)).decode("ascii")
+	return _encode_message_cached(to_email, sender, subject, body_text, attachment)
+
+
+@lru_cache(maxsize=8)
+def _encode_message_cached(
+	to_email: str,
+	sender: Optional[str],
+	subject: str,
+	body_text: str,
+	attachment: Optional[Tuple[str, bytes, str]],
+) -> str:
+	return _b64.urlsafe_b64encode(_build_raw(to_email, sender, subject, body_text, attachment)).decode("ascii")
+
 
 @dataclass
 class GmailClient:
 	client_id: str
 	client_secret: str
 	scopes: Sequence[str] = tuple(GMAIL_SCOPES)
+	refresh_buffer_sec: int = 300
 	_cached_creds: Optional[Credentials] = field(default=None, init=False, repr=False)
+	_cached_service: Optional[object] = field(default=None, init=False, repr=False)
+	_cached_service_creds: Optional[Credentials] = field(default=None, init=False, repr=False)
+	_authorized_http: Optional[google_auth_httplib2.AuthorizedHttp] = field(default=None, init=False, repr=False)
+	_send_lock: Optional[threading.Lock] = field(default=None, init=False, repr=False)
+	_storage_backend: Optional[str] = field(default=None, init=False, repr=False)
+	_config_validated: bool = field(default=False, init=False, repr=False)
+	_env_creds: Optional[Credentials] = field(default=None, init=False, repr=False)
+	_env_raw: Optional[str] = field(default=None, init=False, repr=False)
 
 	def _validate_oauth_config(self) -> None:
 		"""Validate OAuth configuration and provide helpful error messages."""
+		if self._config_validated:
+			return
 		if not self.client_id:
 			raise ValueError("Google OAuth Client ID is required. Set GOOGLE_CLIENT_ID environment variable.")
 		if not self.client_secret:
@@ -37,7 +324,9 @@ class GmailClient:
 				"Client ID should end with '.apps.googleusercontent.com'\n"
 				"Get your Client ID from Google Cloud Console: https://console.cloud.google.com/apis/credentials"
 			)
-		
+		self._config_validated = True
+
+	def _print_oauth_help(self) -> None:
 		# List of required redirect URIs that should be configured in Google Cloud Console
 		required_uris = [
 			"http://localhost:8080/",
@@ -49,7 +338,7 @@ class GmailClient:
 			"http://localhost:9090/",
 			"http://localhost:9091/"
 		]
-		
+
 		print("ℹ️  OAuth Configuration Check:")
 		print(f"   Client ID: {self.client_id}")
 		print("   Required redirect URIs in Google Cloud Console:")
@@ -58,32 +347,56 @@ class GmailClient:
 		print("\n   Configure these URIs at: https://console.cloud.google.com/apis/credentials")
 
 	def _load_credentials_from_keyring(self) -> Optional[Credentials]:
+		global _keyring_payload
+		from google.oauth2.credentials import Credentials
 		try:
-			serialized = keyring.get_password(SERVICE_NAME, TOKEN_USERNAME)
+			serialized = None
+			if _keyring_payload is not None:
+				raw, read_at = _keyring_payload
+				if time.monotonic() - read_at < _KEYRING_PAYLOAD_TTL_SECONDS:
+					serialized = raw
+			if serialized is None:
+				try:
+					serialized = _get_keyring().get_password(SERVICE_NAME, TOKEN_USERNAME)
+				except Exception:
+					# Cached backend can go stale (e.g. dbus disconnect);
+					# fall back to the module-level API.
+					import keyring
+					serialized = keyring.get_password(SERVICE_NAME, TOKEN_USERNAME)
+				_keyring_payload = (serialized, time.monotonic())
 			if not serialized:
 				return None
-			info = json.loads(serialized)
+			info = _parse_token(serialized)
 			creds = Credentials.from_authorized_user_info(info, scopes=self.scopes)
 			if creds and creds.expired and creds.refresh_token:
-				creds.refresh(Request())
+				creds.refresh(_get_refresh_request())
 			return creds
 		except Exception:
 			return None
 
 	def _save_credentials_to_keyring(self, creds: Credentials) -> None:
+		global _keyring_payload
 		try:
-			keyring.set_password(SERVICE_NAME, TOKEN_USERNAME, creds.to_json())
+			serialized = creds.to_json()
+			try:
+				_get_keyring().set_password(SERVICE_NAME, TOKEN_USERNAME, serialized)
+			except Exception:
+				import keyring
+				keyring.set_password(SERVICE_NAME, TOKEN_USERNAME, serialized)
+			_keyring_payload = (serialized, time.monotonic())
 		except Exception:
 			# Fallback to file storage if keyring fails (e.g., in containers)
 			self._save_credentials_to_file(creds)
 
 	def _load_credentials_from_file(self, path: str = "token.json") -> Optional[Credentials]:
-		if not os.path.exists(path):
-			return None
+		from google.oauth2.credentials import Credentials
 		try:
+			# No exists() pre-check: from_authorized_user_file opens the file
+			# itself, so a missing file lands in the except like any other
+			# unreadable token (and there is no check/open TOCTOU window).
 			creds = Credentials.from_authorized_user_file(path, self.scopes)
 			if creds and creds.expired and creds.refresh_token:
-				creds.refresh(Request())
+				creds.refresh(_get_refresh_request())
 			return creds
 		except Exception:
 			return None
@@ -93,38 +406,50 @@ class GmailClient:
 			f.write(creds.to_json())
 
 	def _load_credentials_from_env(self) -> Optional[Credentials]:
+		from google.oauth2.credentials import Credentials
 		raw = os.getenv("CEN_GMAIL_TOKEN_JSON") or os.getenv("GMAIL_AUTHORIZED_USER") or os.getenv("GMAIL_TOKEN_JSON")
 		if not raw:
 			return None
+		# Env tokens don't change within a process; short-circuit repeat loads
+		# so they skip Credentials construction, not just the JSON parse.
+		if self._env_creds is not None and self._env_raw == raw and self._env_creds.valid:
+			return self._env_creds
 		try:
-			info = json.loads(raw)
+			info = _parse_token(raw)
 			creds = Credentials.from_authorized_user_info(info, scopes=self.scopes)
 			if creds and creds.expired and creds.refresh_token:
-				creds.refresh(Request())
+				creds.refresh(_get_refresh_request())
+			self._env_creds = creds
+			self._env_raw = raw
 			return creds
 		except Exception:
 			return None
 
-	def login(self, interactive: bool = True, force: bool = False, storage_backend: str = "keyring", use_console: bool = False, open_browser: bool = True, login_hint: Optional[str] = None) -> Credentials:
-		# Validate OAuth configuration first
-		self._validate_oauth_config()
-		
-		# Standard ports for OAuth redirect URIs
-		standard_ports = [8080, 8081, 8082, 8090, 9000, 9001, 9090, 9091]
-		redirect_uris = [f"http://localhost:{port}/" for port in standard_ports]
-		redirect_uris.append("http://localhost/")  # Fallback
-		
+	def _make_flow(self, redirect_uri: str):
+		"""Build the OAuth flow for one pre-selected redirect URI."""
+		from google_auth_oauthlib.flow import InstalledAppFlow
+
 		client_config = {
 			"installed": {
 				"client_id": self.client_id,
 				"client_secret": self.client_secret,
 				"auth_uri": "https://accounts.google.com/o/oauth2/auth",
 				"token_uri": "https://oauth2.googleapis.com/token",
-				"redirect_uris": redirect_uris,
+				"redirect_uris": [redirect_uri],
 				"auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
 			}
 		}
+		flow = InstalledAppFlow.from_client_config(client_config, self.scopes)
+		flow.redirect_uri = redirect_uri
+		return flow
 
+	def login(self, interactive: bool = True, force: bool = False, storage_backend: str = "keyring", use_console: bool = False, open_browser: bool = True, login_hint: Optional[str] = None, verbose: bool = False) -> Credentials:
+		# Validate OAuth configuration first; the redirect-URI guidance is
+		# only printed on request or when authentication actually fails.
+		self._validate_oauth_config()
+		if verbose:
+			self._print_oauth_help()
+		
 		creds: Optional[Credentials] = None
 		if not force:
 			if storage_backend == "keyring":
@@ -134,12 +459,20 @@ class GmailClient:
 
 		if not creds or not creds.valid:
 			if creds and creds.expired and creds.refresh_token:
-				creds.refresh(Request())
+				creds.refresh(_get_refresh_request())
 			else:
-				flow = InstalledAppFlow.from_client_config(client_config, self.scopes)
 				extra_kwargs = {"access_type": "offline", "prompt": "consent"}
 				if login_hint:
 					extra_kwargs["login_hint"] = login_hint
+
+				# Pre-scan for a bindable port so at most one OAuth handshake
+				# runs, and build the flow exactly once for that redirect URI.
+				port = _find_available_port(_OAUTH_PORTS)
+				if port is None:
+					raise RuntimeError("No available ports from configured redirect URIs. Ensure ports 8080-9091 are available.")
+				redirect_uri = f"http://localhost:{port}/"
+				flow = self._make_flow(redirect_uri)
+
 				if use_console:
 					# For headless/console flow, start a temporary server to catch the callback
 					import threading
@@ -147,46 +480,9 @@ class GmailClient:
 					import socketserver
 					import urllib.parse
 					from queue import Queue
-					
-					# Try to use one of our pre-configured ports
-					ports_to_try = [8080, 8081, 8082, 8090, 9000, 9001, 9090, 9091]
-					port = None
-					
-					# Find an available port from our configured list
-					import socket
-					for test_port in ports_to_try:
-						try:
-							sock = socket.socket()
-							sock.bind(('localhost', test_port))
-							port = test_port
-							sock.close()
-							break
-						except OSError:
-							continue
-					
-					if port is None:
-						raise RuntimeError("No available ports from configured redirect URIs. Ensure ports 8080-9091 are available.")
-					
-					# Set up the redirect URI for this port (must match Google Cloud Console config)
-					redirect_uri = f"http://localhost:{port}/"
+
 					print(f"Using redirect URI: {redirect_uri}")
-					
-					# Create a new client config with only this specific redirect URI
-					console_client_config = {
-						"installed": {
-							"client_id": self.client_id,
-							"client_secret": self.client_secret,
-							"auth_uri": "https://accounts.google.com/o/oauth2/auth",
-							"token_uri": "https://oauth2.googleapis.com/token",
-							"redirect_uris": [redirect_uri],  # Only the one we're using
-							"auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-						}
-					}
-					
-					flow = InstalledAppFlow.from_client_config(console_client_config, self.scopes)
-					# Explicitly set the redirect_uri on the flow
-					flow.redirect_uri = redirect_uri
-					
+
 					# Queue to capture the authorization code
 					code_queue = Queue()
 					
@@ -253,49 +549,25 @@ class GmailClient:
 						except:
 							pass
 				else:
-					# Try ports that match our configured redirect URIs
-					ports_to_try = [8080, 8081, 8082, 8090, 9000, 9001, 9090, 9091]
 					creds = None
 					last_error = None
-					
-					for port in ports_to_try:
-						try:
-							# Create a client config with only this specific redirect URI
-							port_client_config = {
-								"installed": {
-									"client_id": self.client_id,
-									"client_secret": self.client_secret,
-									"auth_uri": "https://accounts.google.com/o/oauth2/auth",
-									"token_uri": "https://oauth2.googleapis.com/token",
-									"redirect_uris": [f"http://localhost:{port}/"],
-									"auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-								}
-							}
-							
-							port_flow = InstalledAppFlow.from_client_config(port_client_config, self.scopes)
-							
-							print(f"🔄 Trying OAuth authentication on port {port}...")
-							creds = port_flow.run_local_server(
-								port=port,
-								host="localhost",
-								open_browser=open_browser,
-								**extra_kwargs
-							)
-							print(f"✅ OAuth authentication successful on port {port}!")
-							break
-							
-						except OSError as e:
-							print(f"⚠️  Port {port} unavailable: {e}")
-							last_error = e
-							continue
-						except Exception as e:
-							print(f"⚠️  OAuth error on port {port}: {e}")
-							last_error = e
-							continue
-							
+					try:
+						print(f"🔄 Trying OAuth authentication on port {port}...")
+						creds = flow.run_local_server(
+							port=port,
+							host="localhost",
+							open_browser=open_browser,
+							**extra_kwargs
+						)
+						print(f"✅ OAuth authentication successful on port {port}!")
+					except Exception as e:
+						print(f"⚠️  OAuth error on port {port}: {e}")
+						last_error = e
+
 					if not creds:
+						self._print_oauth_help()
 						error_msg = (
-							f"❌ OAuth authentication failed on all ports!\n"
+							f"❌ OAuth authentication failed on port {port}!\n"
 							f"Last error: {last_error}\n\n"
 							"✅ Solutions to try:\n"
 							"1. Use console authentication (recommended):\n"
@@ -303,7 +575,7 @@ class GmailClient:
 							"2. Verify Google Cloud Console configuration:\n"
 							"   https://console.cloud.google.com/apis/credentials\n"
 							"   Ensure these redirect URIs are added:\n"
-							f"   {', '.join([f'http://localhost:{p}/' for p in ports_to_try])}\n\n"
+							f"   {', '.join([f'http://localhost:{p}/' for p in _OAUTH_PORTS])}\n\n"
 							"3. Check firewall/network:\n"
 							"   - Ensure ports 8080-9091 are available\n"
 							"   - Try disabling VPN if active\n"
@@ -321,10 +593,30 @@ class GmailClient:
 
 		return creds
 
-	def ensure_logged_in(self, storage_backend: str = "keyring") -> Credentials:
+	def _near_expiry(self, creds: Credentials) -> bool:
+		expiry = getattr(creds, "expiry", None)
+		if expiry is None or not creds.refresh_token:
+			return False
+		# google-auth keeps expiry as a naive UTC datetime.
+		return (expiry - datetime.utcnow()).total_seconds() < self.refresh_buffer_sec
+
+	def ensure_logged_in(self, storage_backend: str = "keyring", interactive: bool = True) -> Credentials:
+		# Remember the backend so later recovery paths (e.g. send_email's 401
+		# re-auth) look the token up in the same store the caller chose.
+		self._storage_backend = storage_backend
 		if self._cached_creds and self._cached_creds.valid:
+			if self._near_expiry(self._cached_creds):
+				_TOKEN_REFRESHER.submit(self, self._cached_creds, storage_backend)
 			return self._cached_creds
 
+		cache_key = (self.client_id, tuple(self.scopes))
+		cached = _CREDS_CACHE.get(cache_key)
+		if cached and cached.valid:
+			self._cached_creds = cached
+			if self._near_expiry(cached):
+				_TOKEN_REFRESHER.submit(self, cached, storage_backend)
+			return cached
+
 		creds = self._load_credentials_from_env()
 		if not creds:
 			if storage_backend == "keyring":
@@ -332,12 +624,47 @@ class GmailClient:
 			else:
 				creds = self._load_credentials_from_file()
 		if not creds:
+			if not interactive:
+				# Background threads must never fall through to the browser
+				# OAuth flow; surface the problem instead.
+				raise RuntimeError(
+					f"No stored Gmail credentials in {storage_backend!r} storage; run `cen login` again."
+				)
 			creds = self.login(interactive=True, storage_backend=storage_backend)
 		self._cached_creds = creds
+		_CREDS_CACHE[cache_key] = creds
 		return creds
 
 	def _build_service(self, creds: Credentials):
-		return build("gmail", "v1", credentials=creds, cache_discovery=False)
+		# Building a service re-parses the discovery document and constructs the
+		# resource tree; reuse it for the lifetime of the credentials object.
+		if self._cached_service is not None and self._cached_service_creds is creds:
+			return self._cached_service
+
+		cache_key = (self.client_id, tuple(self.scopes))
+		entry = _SERVICE_CACHE.get(cache_key)
+		if entry is not None and entry[0] is creds:
+			self._cached_service = entry[1]
+			self._cached_service_creds = creds
+			self._send_lock = entry[2]
+			return entry[1]
+
+		import google_auth_httplib2
+		import httplib2
+		from googleapiclient.discovery import build
+		# Wrap a single httplib2.Http so the TCP+TLS connection to
+		# gmail.googleapis.com is kept alive and reused across sends. The
+		# underlying socket is not thread-safe, so every request through this
+		# transport must hold _send_lock.
+		self._authorized_http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=10))
+		# static_discovery loads the discovery doc bundled with the client
+		# library, skipping the HTTPS fetch on every cold start.
+		service = build("gmail", "v1", http=self._authorized_http, cache_discovery=False, static_discovery=True)
+		self._cached_service = service
+		self._cached_service_creds = creds
+		self._send_lock = threading.Lock()
+		_SERVICE_CACHE[cache_key] = (creds, service, self._send_lock)
+		return service
 
 	def send_email(
 		self,
@@ -346,29 +673,82 @@ class GmailClient:
 		body_text: str,
 		sender: Optional[str] = None,
 		attachment: Optional[Tuple[str, bytes, str]] = None,
+		max_retries: int = 4,
 	) -> str:
-		creds = self._cached_creds or self.ensure_logged_in()
+		from googleapiclient.errors import HttpError
+
+		creds = self._cached_creds or self.ensure_logged_in(storage_backend=self._storage_backend or "keyring")
 		service = self._build_service(creds)
 
-		message = EmailMessage()
-		message["To"] = to_email
-		if sender:
-			message["From"] = sender
-		message["Subject"] = subject
-		message.set_content(body_text)
+		encoded_message = _encode_message(to_email, sender, subject, body_text, attachment)
+		create_message = {"raw": encoded_message}
 
-		if attachment is not None:
-			filename, data, mime_type = attachment
-			main_type, sub_type = mime_type.split("/", 1)
-			message.add_attachment(data, maintype=main_type, subtype=sub_type, filename=filename)
+		for attempt in range(max_retries):
+			try:
+				with self._send_lock:
+					response = (
+						service.users().messages().send(userId="me", body=create_message).execute()
+					)
+				return response.get("id", "")
+			except HttpError as e:
+				status = getattr(e.resp, "status", None)
+				if status == 401 and attempt == 0:
+					# Token revoked or expired mid-flight: drop every cached
+					# credential/service and re-authenticate once.
+					_CREDS_CACHE.pop((self.client_id, tuple(self.scopes)), None)
+					self._cached_creds = None
+					self._cached_service = None
+					self._cached_service_creds = None
+					# Re-auth from the store the caller logged in with, and
+					# never interactively: send_email runs on daemon worker
+					# threads where a browser OAuth flow would block forever.
+					creds = self.ensure_logged_in(
+						storage_backend=self._storage_backend or "keyring",
+						interactive=False,
+					)
+					service = self._build_service(creds)
+					continue
+				# Retry transient quota/server errors with jittered
+				# exponential backoff; 4xx errors are not retried.
+				if status in (429, 500, 502, 503, 504) and attempt < max_retries - 1:
+					time.sleep(min((2 ** attempt) + random.random(), 30))
+					continue
+				raise RuntimeError(f"Gmail send failed: {e}")
+		raise RuntimeError("Gmail send failed: retries exhausted")
 
-		encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-		create_message = {"raw": encoded_message}
+	def send_emails(
+		self,
+		messages: Sequence[Tuple[str, str, str, Optional[str], Optional[Tuple[str, bytes, str]]]],
+	) -> list:
+		"""Send several messages in a single batched HTTP request.
 
-		try:
-			response = (
-				service.users().messages().send(userId="me", body=create_message).execute()
+		Each entry is (to_email, subject, body_text, sender, attachment) as in
+		send_email. Fanning an alert out to N recipients costs one HTTPS
+		round-trip instead of N (the Gmail batch endpoint accepts up to 100
+		calls per request). Returns message ids in input order, with "" for
+		entries the server rejected.
+		"""
+		from googleapiclient.errors import HttpError
+
+		creds = self._cached_creds or self.ensure_logged_in(storage_backend=self._storage_backend or "keyring")
+		service = self._build_service(creds)
+
+		ids: dict = {}
+
+		def _collect(request_id, response, exception) -> None:
+			if exception is None and response:
+				ids[request_id] = response.get("id", "")
+
+		batch = service.new_batch_http_request(callback=_collect)
+		for idx, (to_email, subject, body_text, sender, attachment) in enumerate(messages):
+			raw = _encode_message(to_email, sender, subject, body_text, attachment)
+			batch.add(
+				service.users().messages().send(userId="me", body={"raw": raw}),
+				request_id=str(idx),
 			)
-			return response.get("id", "")
+		try:
+			with self._send_lock:
+				batch.execute()
 		except HttpError as e:
-			raise RuntimeError(f"Gmail send failed: {e}")
+			raise RuntimeError(f"Gmail batch send failed: {e}")
+		return [ids.get(str(i), "") for i in range(len(messages))]
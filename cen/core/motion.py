@@ -1,80 +1,298 @@
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Generator, Optional
 
 import cv2
 import numpy as np
 
+cv2.setUseOptimized(True)
+
+try:
+	from numba import njit, prange
+except ImportError:
+	njit = None
+
+if njit is not None:
+	@njit(parallel=True, cache=True)
+	def _diff_thresh_count(prev, curr, thr):  # pragma: no cover - compiled
+		"""Fused absdiff+threshold+count: one pass over both gray planes."""
+		total = 0
+		for i in prange(prev.shape[0]):
+			row = 0
+			for j in range(prev.shape[1]):
+				d = int(curr[i, j]) - int(prev[i, j])
+				if d < 0:
+					d = -d
+				if d > thr:
+					row += 1
+			total += row
+		return total
+else:
+	_diff_thresh_count = None
+
+# Shared pool for JPEG encoding; OpenCV releases the GIL inside imencode,
+# so encodes overlap with the next frame's capture and differencing.
+_encode_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_encode_pool() -> ThreadPoolExecutor:
+	global _encode_pool
+	if _encode_pool is None:
+		_encode_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cen-jpeg")
+	return _encode_pool
+
+
+# Optional libjpeg-turbo encoder (PyTurboJPEG + system libturbojpeg); its
+# SIMD DCT/Huffman kernels are 2-4x faster than cv2.imencode on the same
+# frames. Resolved lazily and cached; cv2.imencode remains the fallback.
+_turbojpeg = None
+_turbojpeg_unavailable = False
+
+
+def _get_turbojpeg():
+	global _turbojpeg, _turbojpeg_unavailable
+	if _turbojpeg is None and not _turbojpeg_unavailable:
+		try:
+			from turbojpeg import TurboJPEG
+
+			_turbojpeg = TurboJPEG()
+		except Exception:
+			_turbojpeg_unavailable = True
+	return _turbojpeg
+
 
 @dataclass
 class MotionEvent:
 	timestamp: float
 	frame: Optional[np.ndarray]
-	last_notified_at: float = 0.0
 	motion_area: int = 0
 	num_contours: int = 0
 
-	def should_notify(self, min_interval_seconds: int) -> bool:
-		if self.last_notified_at == 0.0:
-			self.last_notified_at = self.timestamp
-			return True
-		if self.timestamp - self.last_notified_at >= min_interval_seconds:
-			self.last_notified_at = self.timestamp
-			return True
-		return False
-
-	def encode_jpeg(self, quality: int = 90):
+	def encode_jpeg(self, quality: int = 90, max_width: Optional[int] = None):
 		if self.frame is None:
 			return False, b""
-		encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
-		ret, buf = cv2.imencode(".jpg", self.frame, encode_params)
+		frame = self.frame
+		if max_width:
+			h, w = frame.shape[:2]
+			if w > max_width:
+				# Downscale before encoding: an alert snapshot does not need
+				# full camera resolution, and JPEG cost scales with pixels.
+				scale = max_width / w
+				frame = cv2.resize(frame, (max_width, int(h * scale)), interpolation=cv2.INTER_AREA)
+		tj = _get_turbojpeg()
+		if tj is not None:
+			try:
+				from turbojpeg import TJSAMP_420
+
+				# Frames are contiguous BGR uint8, exactly what libturbojpeg expects.
+				return True, tj.encode(frame, quality=quality, jpeg_subsample=TJSAMP_420)
+			except Exception:
+				pass
+		# Skip Huffman-table optimization; it is the expensive part of the
+		# encode and irrelevant for throwaway alert snapshots.
+		encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), quality, int(cv2.IMWRITE_JPEG_OPTIMIZE), 0]
+		ret, buf = cv2.imencode(".jpg", frame, encode_params)
+		# tobytes() is the single copy out of OpenCV's encode buffer; the
+		# email builder consumes the bytes without copying them again.
 		return ret, buf.tobytes() if ret else b""
 
+	def encode_jpeg_async(self, quality: int = 90, max_width: Optional[int] = None) -> Future:
+		"""Encode on the shared pool; resolves to the same (ok, bytes) pair."""
+		return _get_encode_pool().submit(self.encode_jpeg, quality, max_width)
+
 
 class MotionDetector:
-	def __init__(self, device_index: int = 0, min_contour_area: int = 500):
+	def __init__(
+		self,
+		device_index: int = 0,
+		min_contour_area: int = 500,
+		detect_scale: float = 0.25,
+		min_interval_seconds: int = 0,
+		frame_width: Optional[int] = None,
+		frame_height: Optional[int] = None,
+		fps: Optional[int] = None,
+	):
 		self.device_index = device_index
 		self.min_contour_area = min_contour_area
-		self.cap = cv2.VideoCapture(self.device_index)
+		# Motion only needs to be localized, not resolved: detect on a
+		# downscaled copy (1/16th the pixels at the default 0.25) and keep
+		# the full-resolution frame for the emitted event. Areas are kept in
+		# full-resolution units externally.
+		self.detect_scale = detect_scale if 0 < detect_scale < 1.0 else 1.0
+		self._area_rescale = 1.0 / (self.detect_scale * self.detect_scale)
+		self._min_area_scaled = max(1, int(min_contour_area / self._area_rescale))
+		# Event throttle lives on the detector (per-event dataclass state would
+		# reset every event) and uses integer monotonic nanoseconds, immune to
+		# wall-clock jumps. 0 disables throttling and yields every event.
+		self._min_interval_ns = int(min_interval_seconds) * 1_000_000_000
+		self._last_notified_ns = 0
+		self._frame_width = frame_width
+		self._frame_height = frame_height
+		self._fps = fps
+		# Consecutive failed-read counter driving the adaptive backoff below.
+		self._read_failures = 0
+		# With an OpenCL runtime present (Intel iGPU, AMD APU, Mali), the
+		# resize/cvtColor/absdiff/threshold chain runs on the GPU via UMat
+		# and the CPU cores stay free for JPEG encoding and the Gmail client.
+		try:
+			self._use_opencl = bool(cv2.ocl.haveOpenCL())
+		except Exception:
+			self._use_opencl = False
+		self._prev_gray_u = None
+		self._u_shape: Optional[tuple] = None
+		self.cap = self._open_capture()
 		if not self.cap.isOpened():
 			raise RuntimeError(f"Unable to open camera device {self.device_index}")
-		self.prev_gray = None
+		# Persistent per-frame buffers; allocated on the first frame and reused
+		# via the dst= form of each OpenCV call so the pipeline does no large
+		# allocations per frame (the loop is memory-bandwidth-bound at 1080p).
+		self._frame_shape: Optional[tuple] = None
+		self._small: Optional[np.ndarray] = None
+		self._gray: Optional[np.ndarray] = None
+		self._prev_gray: Optional[np.ndarray] = None
+		self._diff: Optional[np.ndarray] = None
+		self._thresh: Optional[np.ndarray] = None
+		self._have_prev = False
+
+	def _open_capture(self) -> "cv2.VideoCapture":
+		cap = cv2.VideoCapture(self.device_index)
+		# Request MJPEG frames: roughly a tenth of the USB bandwidth of raw
+		# YUYV at 1080p, decoded on the cheap libjpeg-turbo path instead of
+		# the software YUYV->BGR conversion.
+		cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+		if self._frame_width:
+			cap.set(cv2.CAP_PROP_FRAME_WIDTH, self._frame_width)
+		if self._frame_height:
+			cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self._frame_height)
+		if self._fps:
+			cap.set(cv2.CAP_PROP_FPS, self._fps)
+		# Keep at most one driver-buffered frame so reads never see stale video.
+		cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+		return cap
+
+	def _ensure_buffers(self, shape: tuple) -> None:
+		h, w = shape[:2]
+		if self._frame_shape == (h, w):
+			return
+		self._frame_shape = (h, w)
+		sh = max(1, int(h * self.detect_scale))
+		sw = max(1, int(w * self.detect_scale))
+		self._small = np.empty((sh, sw, 3), np.uint8) if self.detect_scale < 1.0 else None
+		self._gray = np.empty((sh, sw), np.uint8)
+		self._prev_gray = np.empty((sh, sw), np.uint8)
+		self._diff = np.empty((sh, sw), np.uint8)
+		self._thresh = np.empty((sh, sw), np.uint8)
+		self._have_prev = False
 
 	def detect_events(self) -> Generator[MotionEvent, None, None]:
 		while True:
 			ok, frame = self.cap.read()
 			if not ok:
-				time.sleep(0.1)
-				continue
-
-			gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-			if self.prev_gray is None:
-				self.prev_gray = gray
+				# Adaptive backoff: a one-frame glitch costs ~1ms instead of a
+				# fixed 100ms, while a sustained failure backs off to 1s polls
+				# instead of hammering the driver ten times a second.
+				self._read_failures += 1
+				if self._read_failures > 50:
+					# The device has likely gone away (unplugged, driver reset);
+					# re-opening the capture is the only way back.
+					self.cap.release()
+					self.cap = self._open_capture()
+					self._read_failures = 0
+				time.sleep(min(0.001 * (2 ** min(self._read_failures, 10)), 1.0))
 				continue
+			self._read_failures = 0
 
-			diff = cv2.absdiff(self.prev_gray, gray)
-			_, thresh = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
-			contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+			thresh_u = None
+			if self._use_opencl:
+				# GPU path: UMat keeps every intermediate in device memory and
+				# OpenCV's internal buffer pool handles reuse, so the host
+				# touches pixel data again only when an event is emitted.
+				h, w = frame.shape[:2]
+				sh = max(1, int(h * self.detect_scale))
+				sw = max(1, int(w * self.detect_scale))
+				if self._u_shape != (sh, sw):
+					self._u_shape = (sh, sw)
+					self._prev_gray_u = None
+				frame_u = cv2.UMat(frame)
+				if self.detect_scale < 1.0:
+					detect_u = cv2.resize(frame_u, (sw, sh), interpolation=cv2.INTER_AREA)
+				else:
+					detect_u = frame_u
+				gray_u = cv2.cvtColor(detect_u, cv2.COLOR_BGR2GRAY)
+				if self._prev_gray_u is None:
+					self._prev_gray_u = gray_u
+					continue
+				diff_u = cv2.absdiff(self._prev_gray_u, gray_u)
+				_, thresh_u = cv2.threshold(diff_u, 25, 255, cv2.THRESH_BINARY)
+				total_area = cv2.countNonZero(thresh_u)
+				motion_detected = total_area >= self._min_area_scaled
+				self._prev_gray_u = gray_u
+			else:
+				self._ensure_buffers(frame.shape)
+				if self._small is not None:
+					cv2.resize(
+						frame,
+						(self._small.shape[1], self._small.shape[0]),
+						dst=self._small,
+						interpolation=cv2.INTER_AREA,
+					)
+					detect_src = self._small
+				else:
+					detect_src = frame
+				cv2.cvtColor(detect_src, cv2.COLOR_BGR2GRAY, dst=self._gray)
+				if not self._have_prev:
+					self._prev_gray, self._gray = self._gray, self._prev_gray
+					self._have_prev = True
+					continue
 
-			# Aggregate motion metrics
-			total_area = 0
-			qualifying = []
-			for c in contours:
-				area = cv2.contourArea(c)
-				if area >= self.min_contour_area:
-					total_area += int(area)
-					qualifying.append(c)
+				# A changed-pixel count gates the frame; it bounds any blob's
+				# area from above, so quiet frames never pay for labeling.
+				if _diff_thresh_count is not None:
+					# Fused numba kernel reads both gray planes exactly once;
+					# quiet frames (the common case) skip the diff/thresh planes
+					# entirely, which are materialized only for motion frames.
+					total_area = int(_diff_thresh_count(self._prev_gray, self._gray, 25))
+					motion_detected = total_area >= self._min_area_scaled
+					if motion_detected:
+						cv2.absdiff(self._prev_gray, self._gray, dst=self._diff)
+						cv2.threshold(self._diff, 25, 255, cv2.THRESH_BINARY, dst=self._thresh)
+				else:
+					cv2.absdiff(self._prev_gray, self._gray, dst=self._diff)
+					cv2.threshold(self._diff, 25, 255, cv2.THRESH_BINARY, dst=self._thresh)
+					total_area = cv2.countNonZero(self._thresh)
+					motion_detected = total_area >= self._min_area_scaled
 
-			motion_detected = total_area > 0
-
-			self.prev_gray = gray
+				# Ping-pong the gray buffers instead of copying.
+				self._prev_gray, self._gray = self._gray, self._prev_gray
 
 			if motion_detected:
+				now_ns = time.monotonic_ns()
+				if self._min_interval_ns and now_ns - self._last_notified_ns < self._min_interval_ns:
+					continue
+				# connectedComponentsWithStats has no OpenCL kernel; on the GPU
+				# path the threshold plane is downloaded only for frames that
+				# survive both the pixel-count gate and the interval throttle.
+				thresh = thresh_u.get() if thresh_u is not None else self._thresh
+				# Per-blob stats come back as one (N, 5) int32 array; filtering
+				# and summing areas is a pair of NumPy reductions instead of a
+				# Python loop crossing into OpenCV once per contour.
+				_, _, comp_stats, _ = cv2.connectedComponentsWithStats(
+					thresh, connectivity=8, ltype=cv2.CV_32S
+				)
+				areas = comp_stats[1:, cv2.CC_STAT_AREA]  # label 0 is background
+				mask = areas >= self._min_area_scaled
+				num_blobs = int(mask.sum())
+				if num_blobs == 0:
+					# Changed pixels are scattered across blobs that are each
+					# below the minimum area; not motion worth reporting.
+					continue
+				self._last_notified_ns = now_ns
 				yield MotionEvent(
 					timestamp=time.time(),
 					frame=frame,
-					motion_area=total_area,
-					num_contours=len(qualifying),
+					motion_area=int(int(areas[mask].sum()) * self._area_rescale),
+					num_contours=num_blobs,
 				)
 
 	def close(self) -> None: